@@ -4,6 +4,7 @@ import logging
 from pathlib import Path
 
 import nshutils as nu
+import torch
 from lightning.pytorch.strategies import DDPStrategy
 
 import mattertune.configs as MC
@@ -15,6 +16,13 @@ nu.pretty()
 
 
 def main(args_dict: dict):
+    # Allow TF32 for any remaining FP32 matmuls/convolutions (Ampere and newer GPUs)
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    # Let cuDNN autotune its kernels
+    torch.backends.cudnn.benchmark = True
+
     def hparams():
         hparams = MC.MatterTunerConfig.draft()
 
@@ -43,7 +51,10 @@ def main(args_dict: dict):
         hparams.data.dataset.fold_idx = 0
         hparams.data.train_split = args_dict["train_split"]
         hparams.data.batch_size = args_dict["batch_size"]
-        hparams.data.num_workers = 0
+        hparams.data.num_workers = 8
+        hparams.data.persistent_workers = True
+        hparams.data.pin_memory = True
+        hparams.data.prefetch_factor = 4
 
         ## Trainer Hyperparameters
         hparams.trainer = MC.TrainerConfig.draft()
@@ -52,7 +63,7 @@ def main(args_dict: dict):
         hparams.trainer.devices = args_dict["devices"]
         hparams.trainer.gradient_clip_algorithm = "value"
         hparams.trainer.gradient_clip_val = 1.0
-        hparams.trainer.precision = "bf16"
+        hparams.trainer.precision = "bf16-mixed"
 
         # Configure Early Stopping
         hparams.trainer.early_stopping = MC.EarlyStoppingConfig(
@@ -81,7 +92,12 @@ def main(args_dict: dict):
         # Additional trainer settings
         hparams.trainer.additional_trainer_kwargs = {
             "inference_mode": False,
-            "strategy": DDPStrategy(find_unused_parameters=True),
+            # NOTE: No `static_graph=True`: skipped batches backpropagate a
+            #   zero loss with a different autograd graph than the model's.
+            "strategy": DDPStrategy(
+                find_unused_parameters=False,
+                gradient_as_bucket_view=True,
+            ),
         }
 
         hparams = hparams.finalize(strict=False)
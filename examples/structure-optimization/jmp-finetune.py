@@ -4,6 +4,7 @@ import logging
 from pathlib import Path
 
 import nshutils as nu
+import torch
 from lightning.pytorch.strategies import DDPStrategy
 
 import mattertune.configs as MC
@@ -15,6 +16,13 @@ nu.pretty()
 
 
 def main(args_dict: dict):
+    # Allow TF32 for any remaining FP32 matmuls/convolutions (Ampere and newer GPUs)
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    # Let cuDNN autotune its kernels
+    torch.backends.cudnn.benchmark = True
+
     def hparams():
         hparams = MC.MatterTunerConfig.draft()
 
@@ -57,7 +65,7 @@ def main(args_dict: dict):
         hparams.trainer.devices = args_dict["devices"]
         hparams.trainer.gradient_clip_algorithm = "value"
         hparams.trainer.gradient_clip_val = 1.0
-        hparams.trainer.precision = "bf16"
+        hparams.trainer.precision = "bf16-mixed"
 
         # Configure Early Stopping
         hparams.trainer.early_stopping = MC.EarlyStoppingConfig(
@@ -86,8 +94,11 @@ def main(args_dict: dict):
         # Additional trainer settings that need special handling
         hparams.trainer.additional_trainer_kwargs = {
             "inference_mode": False,
+            # NOTE: No `static_graph=True`: skipped batches backpropagate a
+            #   zero loss with a different autograd graph than the model's.
             "strategy": DDPStrategy(
-                static_graph=True, find_unused_parameters=True
+                find_unused_parameters=False,
+                gradient_as_bucket_view=True,
             ),  # Special DDP config
         }
 
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import contextlib
+import functools
 import importlib.util
 import logging
+import operator
+from collections import OrderedDict
+from collections.abc import Callable
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Literal, cast
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, cast
 
 import nshconfig as C
 import nshconfig_extra as CE
@@ -20,6 +24,7 @@ from ...registry import backbone_registry
 from ...util import optional_import_error_message
 
 if TYPE_CHECKING:
+    from ase import Atoms
     from torch_geometric.data.batch import Batch  # type: ignore[reportMissingImports] # noqa
     from torch_geometric.data.data import BaseData  # type: ignore[reportMissingImports] # noqa
 
@@ -47,6 +52,24 @@ class EqV2BackboneConfig(FinetuneModuleBaseConfig):
     """Configuration for converting ASE Atoms to a graph."""
     # TODO: Add functionality to load the atoms to graph config from the checkpoint
 
+    precompute_graph: bool = False
+    """Whether to build the radius graph in the dataloader instead of on the fly.
+
+    If enabled, FAIRChem's ``AtomsToGraphs`` computes the edges on the CPU
+    (in the dataloader workers) and the backbone's on-the-fly graph generation
+    is disabled. The graphs are kept in a per-worker LRU cache, keyed by the
+    exact atomic numbers, positions, cell and PBC of the structure, so that
+    structures that are seen again (e.g., in later epochs with persistent
+    workers) skip the neighbor search.
+
+    The graph uses the backbone's own cutoff and neighbor limit (not the ones
+    in ``atoms_to_graph``), so that it matches what the backbone would have
+    generated on the fly.
+    """
+
+    graph_cache_size: int = 1024
+    """The maximum number of graphs kept in the cache used by ``precompute_graph``."""
+
     @override
     @classmethod
     def ensure_dependencies(cls):
@@ -69,26 +92,21 @@ class EqV2BackboneConfig(FinetuneModuleBaseConfig):
         return EqV2BackboneModule(self)
 
 
-def _combine_scalar_irrep2(stress_head, scalar, irrep2):
-    # Change of basis to compute a rank 2 symmetric tensor
+class _AtomsToGraphsFlags(NamedTuple):
+    """Which labels FAIRChem's ``AtomsToGraphs`` should read from the atoms."""
 
-    vector = torch.zeros((scalar.shape[0], 3), device=scalar.device).detach()
-    flatten_irreps = torch.cat([scalar.reshape(-1, 1), vector, irrep2], dim=1)
-    stress = torch.einsum(
-        "ab, cb->ca",
-        stress_head.block.change_mat.to(flatten_irreps.device),
-        flatten_irreps,
-    )
+    energy: bool
+    forces: bool
+    stress: bool
+    data_keys: list[str] | None
 
-    # stress = rearrange(
-    #     stress,
-    #     "b (three1 three2) -> b three1 three2",
-    #     three1=3,
-    #     three2=3,
-    # ).contiguous()
-    stress = stress.view(-1, 3, 3)
 
-    return stress
+_EQV2_HARDCODED_NAMES: dict[type[props.PropertyConfigBase], str] = {
+    props.EnergyPropertyConfig: "energy",
+    props.ForcesPropertyConfig: "forces",
+    props.StressesPropertyConfig: "stress",
+}
+"""FAIRChem's ``AtomsToGraphs`` stores these properties under fixed names."""
 
 
 def _get_backbone(hparams: EqV2BackboneConfig) -> nn.Module:
@@ -101,7 +119,14 @@ def _get_backbone(hparams: EqV2BackboneConfig) -> nn.Module:
 
     checkpoint = None
     # Loads the config from the checkpoint directly (always on CPU).
-    checkpoint = torch.load(checkpoint_path, map_location=torch.device("cpu"))
+    # The checkpoint is memory-mapped so that its tensors are not fully
+    #   materialized in host memory.
+    checkpoint = torch.load(
+        checkpoint_path,
+        map_location=torch.device("cpu"),
+        weights_only=False,
+        mmap=True,
+    )
     config = checkpoint["config"]
 
     config["trainer"] = config.get("trainer", "ocp")
@@ -154,6 +179,9 @@ def _get_backbone(hparams: EqV2BackboneConfig) -> nn.Module:
         except NotImplementedError:
             log.warning(f"Unable to load checkpoint from {checkpoint_path}")
 
+    # The weights now live in the model, so release the (mmap'd) checkpoint.
+    del checkpoint
+
     # Now, extract the backbone from the trainer and delete the trainer
     with optional_import_error_message("fairchem"):
         from fairchem.core.trainers import OCPTrainer  # type: ignore[reportMissingImports] # noqa
@@ -255,6 +283,128 @@ class EqV2BackboneModule(FinetuneModuleBase["BaseData", "Batch", EqV2BackboneCon
         for prop in self.hparams.properties:
             self.output_heads[prop.name] = self._create_output_head(prop)
 
+        # (name, head, extractor) for every property, resolved once so that
+        #   `model_forward` does not need to dispatch on the property type.
+        self._head_plan: list[
+            tuple[str, nn.Module, Callable[[dict[str, torch.Tensor]], torch.Tensor]]
+        ] = []
+        for prop in self.hparams.properties:
+            head = self.output_heads[prop.name]
+            self._head_plan.append(
+                (prop.name, head, self._create_head_extractor(prop, head))
+            )
+
+        # The Atoms -> graph converters only depend on the (static) property
+        #   configs, so we build them once instead of once per sample.
+        self._a2g_flags = self._resolve_a2g_flags()
+        self._a2g_with_labels = self._create_atoms_to_graphs(self._a2g_flags)
+        self._a2g_no_labels = self._create_atoms_to_graphs(None)
+
+        # If the graph is precomputed, the edges come from the dataloader
+        #   instead of being generated by the backbone.
+        self._graph_cache: OrderedDict[
+            tuple[bytes, ...], tuple[torch.Tensor, torch.Tensor]
+        ] = OrderedDict()
+        if self.hparams.precompute_graph:
+            self.backbone.otf_graph = False
+            # The edges must match the ones the backbone would have generated
+            #   itself, so we take the cutoff and neighbor limit from the
+            #   backbone instead of from `atoms_to_graph`.
+            radius = float(self.backbone.cutoff)
+            max_neigh = int(self.backbone.max_neighbors)
+            if (radius, max_neigh) != (
+                self.hparams.atoms_to_graph.radius,
+                self.hparams.atoms_to_graph.max_num_neighbors,
+            ):
+                log.warning(
+                    "`atoms_to_graph` does not match the backbone's graph settings "
+                    f"(cutoff={radius}, max_neighbors={max_neigh}). "
+                    "Using the backbone's settings for the precomputed graphs."
+                )
+
+            # Used on cache misses, so that the labels and the edges come from
+            #   a single conversion.
+            self._a2g_with_labels_edges = self._create_atoms_to_graphs(
+                self._a2g_flags, r_edges=True, radius=radius, max_neigh=max_neigh
+            )
+            self._a2g_no_labels_edges = self._create_atoms_to_graphs(
+                None, r_edges=True, radius=radius, max_neigh=max_neigh
+            )
+
+        # (property name, key in the FAIRChem batch) pairs for `batch_to_labels`.
+        self._label_key_map = [
+            (prop.name, _EQV2_HARDCODED_NAMES.get(type(prop), prop.name))
+            for prop in self.hparams.properties
+        ]
+
+        # Transposed change of basis matrix for the stress head, keyed by
+        #   (device, dtype) and lazily populated on the first stress forward.
+        self._change_mat_T: dict[tuple[torch.device, torch.dtype], torch.Tensor] = {}
+
+    def _combine_scalar_irrep2(
+        self,
+        stress_head: nn.Module,
+        scalar: torch.Tensor,
+        irrep2: torch.Tensor,
+    ):
+        # Change of basis to compute a rank 2 symmetric tensor
+
+        # Layout: [scalar (1) | vector (3, always zero) | irrep2 (5)]
+        flatten_irreps = scalar.new_zeros((scalar.shape[0], 9))
+        flatten_irreps[:, 0] = scalar.view(-1)
+        flatten_irreps[:, 4:9] = irrep2
+
+        key = (flatten_irreps.device, flatten_irreps.dtype)
+        if (change_mat_T := self._change_mat_T.get(key)) is None:
+            change_mat = cast(torch.Tensor, stress_head.block.change_mat)
+            change_mat_T = (
+                change_mat.detach()
+                .to(device=flatten_irreps.device, dtype=flatten_irreps.dtype)
+                .T.contiguous()
+            )
+            self._change_mat_T[key] = change_mat_T
+
+        # Equivalent to `einsum("ab, cb->ca", change_mat, flatten_irreps)`,
+        #   but as a single GEMM with the cached, pre-transposed matrix.
+        stress = flatten_irreps @ change_mat_T
+
+        # stress = rearrange(
+        #     stress,
+        #     "b (three1 three2) -> b three1 three2",
+        #     three1=3,
+        #     three2=3,
+        # ).contiguous()
+        stress = stress.view(-1, 3, 3)
+
+        return stress
+
+    def _extract_stress(
+        self, stress_head: nn.Module, head_output: dict[str, torch.Tensor]
+    ):
+        # Convert the stress tensor to the full 3x3 form
+        stress_rank0 = head_output["stress_isotropic"]  # (bsz 1)
+        stress_rank2 = head_output["stress_anisotropic"]  # (bsz, 5)
+        return self._combine_scalar_irrep2(stress_head, stress_rank0, stress_rank2)
+
+    def _create_head_extractor(
+        self, prop: props.PropertyConfig, head: nn.Module
+    ) -> Callable[[dict[str, torch.Tensor]], torch.Tensor]:
+        """Returns a function that extracts the prediction from the head's output."""
+        match prop:
+            case props.EnergyPropertyConfig():
+                return operator.itemgetter("energy")
+            case props.ForcesPropertyConfig():
+                return operator.itemgetter("forces")
+            case props.StressesPropertyConfig():
+                return functools.partial(self._extract_stress, head)
+            case props.GraphPropertyConfig():
+                return operator.itemgetter("energy")
+            case _:
+                assert_never(prop)
+
+    # `model_forward_context` is a no-op, so there is no need to enter it
+    _has_forward_context = False
+
     @override
     @contextlib.contextmanager
     def model_forward_context(self, data):
@@ -267,34 +417,8 @@ class EqV2BackboneModule(FinetuneModuleBase["BaseData", "Batch", EqV2BackboneCon
 
         # Feed the backbone output to the output heads
         predicted_properties: dict[str, torch.Tensor] = {}
-        for name, head in self.output_heads.items():
-            assert (
-                prop := next(
-                    (p for p in self.hparams.properties if p.name == name), None
-                )
-            ) is not None, (
-                f"Property {name} not found in properties. "
-                "This should not happen, please report this."
-            )
-
-            head_output: dict[str, torch.Tensor] = head(batch, emb)
-
-            match prop:
-                case props.EnergyPropertyConfig():
-                    pred = head_output["energy"]
-                case props.ForcesPropertyConfig():
-                    pred = head_output["forces"]
-                case props.StressesPropertyConfig():
-                    # Convert the stress tensor to the full 3x3 form
-                    stress_rank0 = head_output["stress_isotropic"]  # (bsz 1)
-                    stress_rank2 = head_output["stress_anisotropic"]  # (bsz, 5)
-                    pred = _combine_scalar_irrep2(head, stress_rank0, stress_rank2)
-                case props.GraphPropertyConfig():
-                    pred = head_output["energy"]
-                case _:
-                    assert_never(prop)
-
-            predicted_properties[name] = pred
+        for name, head, extract in self._head_plan:
+            predicted_properties[name] = extract(head(batch, emb))
 
         pred_dict: ModelOutput = {"predicted_properties": predicted_properties}
         if return_backbone_output:
@@ -320,7 +444,12 @@ class EqV2BackboneModule(FinetuneModuleBase["BaseData", "Batch", EqV2BackboneCon
         with optional_import_error_message("fairchem"):
             from fairchem.core.datasets import data_list_collater  # type: ignore[reportMissingImports] # noqa
 
-        return cast("Batch", data_list_collater(data_list, otf_graph=True))
+        return cast(
+            "Batch",
+            data_list_collater(
+                data_list, otf_graph=not self.hparams.precompute_graph
+            ),
+        )
 
     @override
     def gpu_batch_transform(self, batch):
@@ -328,75 +457,104 @@ class EqV2BackboneModule(FinetuneModuleBase["BaseData", "Batch", EqV2BackboneCon
 
     @override
     def batch_to_labels(self, batch):
-        HARDCODED_NAMES: dict[type[props.PropertyConfigBase], str] = {
-            props.EnergyPropertyConfig: "energy",
-            props.ForcesPropertyConfig: "forces",
-            props.StressesPropertyConfig: "stress",
-        }
-
         labels: dict[str, torch.Tensor] = {}
-        for prop in self.hparams.properties:
-            batch_prop_name = HARDCODED_NAMES.get(type(prop), prop.name)
-            labels[prop.name] = batch[batch_prop_name]
+        for prop_name, batch_prop_name in self._label_key_map:
+            labels[prop_name] = batch[batch_prop_name]
 
         return labels
 
-    @override
-    def atoms_to_data(self, atoms, has_labels):
-        with optional_import_error_message("fairchem"):
-            from fairchem.core.preprocessing import AtomsToGraphs  # type: ignore[reportMissingImports] # noqa
-
+    def _resolve_a2g_flags(self):
         energy = False
         forces = False
         stress = False
-        data_keys = None
-        if has_labels:
-            energy = any(
-                isinstance(prop, props.EnergyPropertyConfig)
-                for prop in self.hparams.properties
-            )
-            forces = any(
-                isinstance(prop, props.ForcesPropertyConfig)
-                for prop in self.hparams.properties
-            )
-            stress = any(
-                isinstance(prop, props.StressesPropertyConfig)
-                for prop in self.hparams.properties
+        data_keys: list[str] = []
+        for prop in self.hparams.properties:
+            match prop:
+                case props.EnergyPropertyConfig():
+                    energy = True
+                case props.ForcesPropertyConfig():
+                    forces = True
+                case props.StressesPropertyConfig():
+                    stress = True
+                case _:
+                    data_keys.append(prop.name)
+
+        return _AtomsToGraphsFlags(
+            energy=energy, forces=forces, stress=stress, data_keys=data_keys
+        )
+
+    def _create_atoms_to_graphs(
+        self,
+        flags: _AtomsToGraphsFlags | None,
+        r_edges: bool = False,
+        radius: float | None = None,
+        max_neigh: int | None = None,
+    ):
+        with optional_import_error_message("fairchem"):
+            from fairchem.core.preprocessing import AtomsToGraphs  # type: ignore[reportMissingImports] # noqa
+
+        # `flags=None` means that we do not read any labels from the atoms.
+        if flags is None:
+            flags = _AtomsToGraphsFlags(
+                energy=False, forces=False, stress=False, data_keys=None
             )
-            data_keys = [
-                prop.name
-                for prop in self.hparams.properties
-                if not isinstance(
-                    prop,
-                    (
-                        props.EnergyPropertyConfig,
-                        props.ForcesPropertyConfig,
-                        props.StressesPropertyConfig,
-                    ),
-                )
-            ]
 
-        a2g = AtomsToGraphs(
-            max_neigh=self.hparams.atoms_to_graph.max_num_neighbors,
+        if radius is None:
+            radius = self.hparams.atoms_to_graph.radius
+        if max_neigh is None:
+            max_neigh = self.hparams.atoms_to_graph.max_num_neighbors
+
+        return AtomsToGraphs(
+            max_neigh=max_neigh,
             radius=cast(
-                int, self.hparams.atoms_to_graph.radius
+                int, radius
             ),  # Stupid typing of the radius arg by the FAIRChem devs; it should be a float.
-            r_energy=energy,
-            r_forces=forces,
-            r_stress=stress,
-            r_data_keys=data_keys,
+            r_energy=flags.energy,
+            r_forces=flags.forces,
+            r_stress=flags.stress,
+            r_data_keys=flags.data_keys,
             r_distances=False,
-            r_edges=False,
+            r_edges=r_edges,
             r_pbc=True,
         )
+
+    def _convert_with_cached_graph(self, atoms: Atoms, has_labels: bool):
+        key = (
+            atoms.numbers.tobytes(),
+            atoms.positions.tobytes(),
+            atoms.cell.array.tobytes(),
+            atoms.pbc.tobytes(),
+        )
+        if (graph := self._graph_cache.get(key)) is not None:
+            # Cache hit: convert without the neighbor search and reuse the edges
+            self._graph_cache.move_to_end(key)
+            a2g = self._a2g_with_labels if has_labels else self._a2g_no_labels
+            data = a2g.convert(atoms)
+            data.edge_index, data.cell_offsets = graph
+            return data
+
+        # Cache miss: a single conversion computes both the labels and the edges
+        a2g = self._a2g_with_labels_edges if has_labels else self._a2g_no_labels_edges
         data = a2g.convert(atoms)
+        self._graph_cache[key] = (data.edge_index, data.cell_offsets)
+        if len(self._graph_cache) > self.hparams.graph_cache_size:
+            self._graph_cache.popitem(last=False)
+        return data
+
+    @override
+    def atoms_to_data(self, atoms, has_labels):
+        if self.hparams.precompute_graph:
+            data = self._convert_with_cached_graph(atoms, has_labels)
+        else:
+            a2g = self._a2g_with_labels if has_labels else self._a2g_no_labels
+            data = a2g.convert(atoms)
 
         # Reshape the cell and stress tensors to (1, 3, 3)
         #   so that they can be properly batched by the collate_fn.
-        if hasattr(data, "cell"):
-            data.cell = data.cell.reshape(1, 3, 3)
-        if hasattr(data, "stress"):
-            data.stress = data.stress.reshape(1, 3, 3)
+        # NOTE: We always request PBC (`r_pbc=True`), so the cell is always present.
+        data.cell = data.cell.view(1, 3, 3)
+        if has_labels and self._a2g_flags.stress:
+            data.stress = data.stress.view(1, 3, 3)
 
         return data
 
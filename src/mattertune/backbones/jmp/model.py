@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import contextlib
 import importlib.util
 import logging
 from collections.abc import Iterable
@@ -15,6 +14,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from ase import Atoms
+from ase.constraints import FixAtoms
 from typing_extensions import final, override
 
 from ...finetune import properties as props
@@ -119,6 +119,16 @@ class JMPBackboneConfig(FinetuneModuleBaseConfig):
     freeze_backbone: bool = False
     """Whether to freeze the backbone during training."""
 
+    cache_graph: bool = False
+    """Whether to reuse the graph computed by the graph computer when the next
+    batch has exactly the same structures (atomic numbers, tags, positions,
+    cells and number of atoms), compared on the host when batches are collated.
+    This is useful for inference loops that repeatedly evaluate unchanged
+    structures. The cache is only used outside of training, is bypassed when the
+    positions require gradients (e.g., for conservative forces/stresses), and
+    is cleared at the start of every training, validation, test and predict
+    run."""
+
     @override
     def create_model(self):
         return JMPBackboneModule(self)
@@ -141,6 +151,11 @@ class JMPBackboneConfig(FinetuneModuleBaseConfig):
             )
 
 
+# Indices that expand a Voigt-ordered stress (xx, yy, zz, yz, xz, xy) into the
+#   full symmetric 3x3 tensor, equivalent to ASE's `voigt_6_to_full_3x3_stress`.
+_VOIGT_IDX = torch.tensor([[0, 5, 4], [5, 1, 3], [4, 3, 2]], dtype=torch.long)
+
+
 @final
 class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
     @override
@@ -159,7 +174,7 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
         raise ValueError("No energy property found in the property list")
 
     def _create_output_head(self, prop: props.PropertyConfig):
-        activation_cls = get_activation_cls(self.backbone.hparams.activation)
+        activation_cls = self._activation_cls
         match prop:
             case props.EnergyPropertyConfig():
                 with optional_import_error_message("jmp"):
@@ -243,6 +258,7 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
         )
 
         # Create the output heads
+        self._activation_cls = get_activation_cls(self.backbone.hparams.activation)
         self.output_heads = nn.ModuleDict()
         ## Rearange the properties to move the energy property to the front and stress second
         self.hparams.properties = sorted(
@@ -255,21 +271,34 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
         for prop in self.hparams.properties:
             self.output_heads[prop.name] = self._create_output_head(prop)
 
+        # Flattened views of the heads/properties for the per-step hot paths.
+        # NOTE: These are plain tuples on purpose. Registering the heads a second
+        #   time (e.g., in an `nn.ModuleList`) would duplicate their keys in the
+        #   state dict and break loading existing checkpoints.
+        self._head_names = tuple(self.output_heads.keys())
+        self._heads: tuple[nn.Module, ...] = tuple(self.output_heads.values())
+        self._prop_names = tuple(prop.name for prop in self.hparams.properties)
+
+        # The last (fingerprint, graph attributes) pair, see `cache_graph`
+        self._graph_cache: tuple[tuple[bytes, ...], dict[str, Any]] | None = None
+
     @override
     def trainable_parameters(self) -> Iterable[torch.nn.Parameter]:
         if not self.hparams.freeze_backbone:
-            yield from self.backbone.parameters()
-        for head in self.output_heads.values():
-            yield from head.parameters()
+            yield from self._backbone_parameters
+        yield from self._head_parameters
 
     @override
-    @contextlib.contextmanager
     def model_forward_context(self, data):
+        # Enter the heads' contexts right away and hand them over to the caller
+        #   (`pop_all`), instead of going through a generator-based context
+        #   manager. If entering one of the contexts fails, the ones that were
+        #   already entered are exited by the `with` block.
         with ExitStack() as stack:
-            for head in self.output_heads.values():
+            for head in self._heads:
                 stack.enter_context(head.forward_context(data))
 
-            yield
+            return stack.pop_all()
 
     @override
     def model_forward(self, batch, return_backbone_output=False):
@@ -284,7 +313,7 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
             "backbone_output": backbone_output,
             "predicted_props": predicted_properties,
         }
-        for name, head in self.output_heads.items():
+        for name, head in zip(self._head_names, self._heads):
             output = head(head_input)
             if torch.isnan(output).any() or torch.isinf(output).any():
                 raise _SkipBatchError("NaN or inf detected in the output")
@@ -313,18 +342,69 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
         with optional_import_error_message("torch_geometric"):
             from torch_geometric.data import Batch  # type: ignore[reportMissingImports] # noqa
 
-        return Batch.from_data_list(cast("list[BaseData]", data_list))
+        if (batch := _fast_collate(data_list)) is None:
+            batch = Batch.from_data_list(cast("list[BaseData]", data_list))
+
+        # Fingerprint the structures while the batch is still on the host, so
+        #   that `gpu_batch_transform` does not need to compare device tensors.
+        # NOTE: Attributes with a leading underscore are not stored as data
+        #   in PyG's `Data`/`Batch`, so this does not end up in the batch itself.
+        if self.hparams.cache_graph:
+            batch._graph_fingerprint = tuple(
+                cast(torch.Tensor, batch[key]).numpy().tobytes()
+                for key in ("atomic_numbers", "tags", "pos", "cell", "natoms")
+            )
+        return batch
 
     @override
     def gpu_batch_transform(self, batch):
-        return self.graph_computer(batch)
+        fingerprint: tuple[bytes, ...] | None = getattr(
+            batch, "_graph_fingerprint", None
+        )
+        if fingerprint is None or self.training or batch.pos.requires_grad:
+            return self.graph_computer(batch)
+
+        if (cache := self._graph_cache) is not None and cache[0] == fingerprint:
+            for attr, value in cache[1].items():
+                batch[attr] = value
+            return batch
+
+        # Store all post-transform attributes (including any that the graph
+        #   computer replaced or rewrote), except for the labels, which may
+        #   differ between otherwise identical structures.
+        batch = self.graph_computer(batch)
+        self._graph_cache = (
+            fingerprint,
+            {
+                attr: value
+                for attr, value in batch.to_dict().items()
+                if attr not in self._prop_names
+            },
+        )
+        return batch
+
+    def _clear_graph_cache(self):
+        self._graph_cache = None
+
+    @override
+    def on_train_start(self):
+        self._clear_graph_cache()
+
+    @override
+    def on_validation_start(self):
+        self._clear_graph_cache()
+
+    @override
+    def on_test_start(self):
+        self._clear_graph_cache()
+
+    @override
+    def on_predict_start(self):
+        self._clear_graph_cache()
 
     @override
     def batch_to_labels(self, batch):
-        labels: dict[str, torch.Tensor] = {}
-        for prop in self.hparams.properties:
-            labels[prop.name] = getattr(batch, prop.name)
-        return labels
+        return {name: getattr(batch, name) for name in self._prop_names}
 
     @override
     def atoms_to_data(self, atoms, has_labels):
@@ -343,16 +423,27 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
         #       if you don't have this information.
         # - cell: The cell vectors (shape: (1, 3, 3))
         # - pbc: The periodic boundary conditions (shape: (1, 3))
+        # NOTE: We wrap freshly allocated NumPy arrays with `torch.from_numpy`
+        #   (zero-copy), so the only copies made are the (necessary) ones that
+        #   also convert the dtype. `np.array` always copies, so the tensors
+        #   never alias the arrays of the `Atoms` object.
+        n_atoms = len(atoms)
+        # The integer per-atom attributes share a single (2, N) allocation; each
+        #   row is a contiguous view.
+        int_attrs = np.empty((2, n_atoms), dtype=np.int64)
+        int_attrs[0] = atoms.numbers
+        int_attrs[1] = 2
+        atomic_numbers, tags = torch.from_numpy(int_attrs).unbind(0)
         data_dict: dict[str, torch.Tensor] = {
-            "pos": torch.tensor(atoms.positions, dtype=torch.float32),
-            "atomic_numbers": torch.tensor(atoms.numbers, dtype=torch.long),
-            "natoms": torch.tensor(len(atoms), dtype=torch.long),
-            "tags": torch.full((len(atoms),), 2, dtype=torch.long),
-            "fixed": torch.from_numpy(_get_fixed(atoms)).bool(),
-            "cell": torch.from_numpy(np.array(atoms.cell, dtype=np.float32))
-            .float()
-            .unsqueeze(0),
-            "pbc": torch.tensor(atoms.pbc, dtype=torch.bool).unsqueeze(0),
+            "pos": torch.from_numpy(np.array(atoms.positions, dtype=np.float32)),
+            "atomic_numbers": atomic_numbers,
+            "natoms": torch.tensor(n_atoms, dtype=torch.long),
+            "tags": tags,
+            "fixed": torch.from_numpy(_get_fixed(atoms)),
+            "cell": torch.from_numpy(
+                np.array(atoms.cell.array, dtype=np.float32)
+            ).view(1, 3, 3),
+            "pbc": torch.tensor(atoms.pbc, dtype=torch.bool).view(1, 3),
         }
 
         if has_labels:
@@ -366,10 +457,17 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
                 # For stress, we should make sure it is (3, 3), not the flattened (6,)
                 #   that ASE returns.
                 if isinstance(prop, props.StressesPropertyConfig):
-                    from ase.constraints import voigt_6_to_full_3x3_stress
-
-                    value = voigt_6_to_full_3x3_stress(value.float().numpy())
-                    value = torch.from_numpy(value).float().reshape(1, 3, 3)
+                    match value.numel():
+                        case 6:
+                            value = value.float().flatten()[_VOIGT_IDX]
+                        case 9:
+                            value = value.float()
+                        case _:
+                            raise ValueError(
+                                f"Expected the stress to be in Voigt form (6,) or a full "
+                                f"(3, 3) tensor, but got shape {tuple(value.shape)}."
+                            )
+                    value = value.reshape(1, 3, 3)
 
                 data_dict[prop.name] = value
 
@@ -377,37 +475,86 @@ class JMPBackboneModule(FinetuneModuleBase["Data", "Batch", JMPBackboneConfig]):
 
     @override
     def create_normalization_context_from_batch(self, batch):
-        with optional_import_error_message("torch_scatter"):
-            from torch_scatter import scatter  # type: ignore[reportMissingImports] # noqa
-
         atomic_numbers: torch.Tensor = batch["atomic_numbers"].long()  # (n_atoms,)
         batch_idx: torch.Tensor = batch["batch"]  # (n_atoms,)
 
         # Convert atomic numbers to one-hot encoding
         atom_types_onehot = F.one_hot(atomic_numbers, num_classes=120)  # (n_atoms, 120)
 
-        compositions = scatter(
-            atom_types_onehot,
-            batch_idx,
-            dim=0,
-            dim_size=batch.num_graphs,
-            reduce="sum",
-        )
+        # Sum the one-hot encodings per graph. `index_add_` is the native
+        #   equivalent of `torch_scatter.scatter(..., reduce="sum")` and can be
+        #   captured by `torch.compile`.
+        compositions = atom_types_onehot.new_zeros(
+            (batch.num_graphs, atom_types_onehot.shape[-1])
+        ).index_add_(0, batch_idx, atom_types_onehot)
         compositions = compositions[:, 1:]  # Remove the zeroth element
         return NormalizationContext(compositions=compositions)
 
 
+def _fast_collate(data_list: list[Data]) -> Batch | None:
+    """
+    Collates the `Data` objects created by `atoms_to_data` into a `Batch`.
+
+    This is equivalent to `Batch.from_data_list` for our samples, which only
+    hold tensors that are either scalars (stacked) or concatenated along the
+    first dimension and never need to be incremented. It skips PyG's generic
+    per-sample, per-key `__cat_dim__`/`__inc__` dispatch. Returns `None` if the
+    samples do not have this layout, in which case the caller should fall back
+    to `Batch.from_data_list`.
+    """
+    with optional_import_error_message("torch_geometric"):
+        from torch_geometric.data import Batch  # type: ignore[reportMissingImports] # noqa
+
+    if not data_list:
+        return None
+
+    samples = [data.to_dict() for data in data_list]
+    keys = samples[0].keys()
+    if (
+        "pos" not in keys
+        # PyG concatenates "*index*"/"*face*" attributes along the last
+        #   dimension and increments them, which we don't handle here.
+        or any("index" in key or "face" in key for key in keys)
+        or any(sample.keys() != keys for sample in samples)
+        or not all(torch.is_tensor(value) for value in samples[0].values())
+    ):
+        return None
+
+    num_graphs = len(samples)
+    attrs: dict[str, torch.Tensor] = {}
+    slice_dict: dict[str, torch.Tensor] = {}
+    for key in keys:
+        values = [sample[key] for sample in samples]
+        if values[0].dim() == 0:
+            attrs[key] = torch.stack(values)
+            sizes = torch.ones(num_graphs, dtype=torch.long)
+        else:
+            attrs[key] = torch.cat(values, dim=0)
+            sizes = torch.tensor([value.shape[0] for value in values])
+        slice_dict[key] = F.pad(torch.cumsum(sizes, 0), (1, 0))
+
+    num_nodes = torch.tensor([sample["pos"].shape[0] for sample in samples])
+    attrs["batch"] = torch.repeat_interleave(num_nodes)
+    attrs["ptr"] = F.pad(torch.cumsum(num_nodes, 0), (1, 0))
+
+    batch = Batch(**attrs)
+    batch._slice_dict = slice_dict
+    batch._inc_dict = {key: None for key in keys}
+    batch._num_graphs = num_graphs
+    return batch
+
+
 def _get_fixed(atoms: Atoms):
     """Gets the fixed atom constraint mask from an Atoms object."""
-    fixed = np.zeros(len(atoms), dtype=np.bool_)
     if (constraints := getattr(atoms, "constraints", None)) is None:
         raise ValueError("Atoms object does not have a constraints attribute")
 
-    from ase.constraints import FixAtoms
+    fixed = np.zeros(len(atoms), dtype=np.bool_)
+    # Most structures have no constraints at all
+    if not constraints:
+        return fixed
 
-    for constraint in constraints:
-        if not isinstance(constraint, FixAtoms):
-            continue
-        fixed[constraint.index] = True
+    if indices := [c.index for c in constraints if isinstance(c, FixAtoms)]:
+        fixed[np.concatenate(indices)] = True
 
     return fixed
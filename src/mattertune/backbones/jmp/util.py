@@ -1,29 +1,39 @@
 from __future__ import annotations
 
+import functools
+from collections.abc import Callable
+
 import torch.nn as nn
 
 from ...util import optional_import_error_message
 
 
+def _scaled_silu_cls() -> type[nn.Module]:
+    with optional_import_error_message("jmp"):
+        from jmp.models.gemnet.layers.base_layers import ScaledSiLU  # type: ignore[reportMissingImports] # noqa
+
+    return ScaledSiLU
+
+
+# Activation name -> thunk returning the activation class. Thunks keep the
+#   `jmp` import lazy until the activation is actually requested.
+_ACTIVATIONS: dict[str, Callable[[], type[nn.Module]]] = {
+    "relu": lambda: nn.ReLU,
+    "silu": lambda: nn.SiLU,
+    "swish": lambda: nn.SiLU,
+    "scaled_silu": _scaled_silu_cls,
+    "scaled_swish": _scaled_silu_cls,
+    "tanh": lambda: nn.Tanh,
+    "sigmoid": lambda: nn.Sigmoid,
+    "identity": lambda: nn.Identity,
+}
+
+
+@functools.lru_cache(maxsize=None)
 def get_activation_cls(activation: str) -> type[nn.Module]:
     """
     Get the activation class from the activation name
     """
-    match activation.lower():
-        case "relu":
-            return nn.ReLU
-        case "silu" | "swish":
-            return nn.SiLU
-        case "scaled_silu" | "scaled_swish":
-            with optional_import_error_message("jmp"):
-                from jmp.models.gemnet.layers.base_layers import ScaledSiLU  # type: ignore[reportMissingImports] # noqa
-
-            return ScaledSiLU
-        case "tanh":
-            return nn.Tanh
-        case "sigmoid":
-            return nn.Sigmoid
-        case "identity":
-            return nn.Identity
-        case _:
-            raise ValueError(f"Activation {activation} is not supported")
+    if (thunk := _ACTIVATIONS.get(activation.lower())) is None:
+        raise ValueError(f"Activation {activation} is not supported")
+    return thunk()
@@ -207,6 +207,9 @@ class M3GNetBackboneModule(
                 "Stress calculation requires force calculation, cannot calculate stress without force"
             )
 
+        # The forward context only enables gradients for forces/stresses
+        self._has_forward_context = self.calc_forces or self.calc_stress
+
     @override
     @contextlib.contextmanager
     def model_forward_context(self, data):
@@ -207,6 +207,12 @@ class ORBBackboneModule(
         for prop in self.hparams.properties:
             self.output_heads[prop.name] = self._create_output_head(prop)
 
+        # Property lookup by name for `model_forward`
+        self._prop_by_name = {prop.name: prop for prop in self.hparams.properties}
+
+    # `model_forward_context` is a no-op, so there is no need to enter it
+    _has_forward_context = False
+
     @override
     @contextlib.contextmanager
     def model_forward_context(self, data):
@@ -220,15 +226,7 @@ class ORBBackboneModule(
         # Feed the backbone output to the output heads
         predicted_properties: dict[str, torch.Tensor] = {}
         for name, head in self.output_heads.items():
-            assert (
-                prop := next(
-                    (p for p in self.hparams.properties if p.name == name), None
-                )
-            ) is not None, (
-                f"Property {name} not found in properties. "
-                "This should not happen, please report this."
-            )
-
+            prop = self._prop_by_name[name]
             batch = cast("AtomGraphs", head(batch))
 
             match prop_type := prop.property_type():
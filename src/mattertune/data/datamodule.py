@@ -8,12 +8,18 @@ from typing import TYPE_CHECKING, Annotated, Any, Literal
 import ase
 import nshconfig as C
 import numpy as np
+import torch
 from lightning.pytorch import LightningDataModule
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, SequentialSampler
 from typing_extensions import TypeAliasType, TypedDict, override
 
 from ..registry import data_registry
 from .base import DatasetConfig
+from .util.bucket_batch_sampler import BucketBatchSampler
+from .util.cuda_stream_transfer import (
+    CUDAStreamBatchTransfer,
+    supports_non_blocking_transfer,
+)
 from .util.split_dataset import SplitDataset
 
 if TYPE_CHECKING:
@@ -48,6 +54,44 @@ class DataModuleBaseConfig(C.Config, ABC):
     This is useful for speeding up GPU data transfer.
     """
 
+    persistent_workers: bool = True
+    """Whether to keep the dataloader worker processes alive between epochs.
+
+    This avoids re-spawning the workers at the start of every epoch, at the
+    cost of keeping the workers (and their memory) around for the whole run.
+    Only has an effect if ``num_workers > 0``.
+    """
+
+    prefetch_factor: int | None = 4
+    """The number of batches loaded in advance by each worker.
+
+    Higher values smooth out slow batches at the cost of more host memory.
+    If ``None``, PyTorch's default is used.
+    Only has an effect if ``num_workers > 0``.
+    """
+
+    cuda_stream_transfer: bool = False
+    """Whether to copy batches to the GPU on a dedicated CUDA side stream.
+
+    This lets the host-to-device copy of the next batch overlap with the
+    GPU work of the previous training step. Works best with ``pin_memory=True``.
+    Only supported for PyTorch Geometric batches; other batch types use
+    Lightning's default transfer.
+    """
+
+    bucket_by_num_atoms: bool = False
+    """Whether to group structures with a similar number of atoms into the same batch.
+
+    If enabled, the dataloaders use a :class:`BucketBatchSampler`, which sorts
+    pools of ``batch_size * bucket_size_multiplier`` structures by their number
+    of atoms before splitting them into batches. This reduces the size imbalance
+    within a batch. Note that this requires loading every structure once to
+    count its atoms.
+    """
+
+    bucket_size_multiplier: int = 100
+    """The size of the sorting pools used by ``bucket_by_num_atoms``, in batches."""
+
     def _num_workers_or_auto(self):
         if self.num_workers == "auto":
             import os
@@ -60,12 +104,21 @@ class DataModuleBaseConfig(C.Config, ABC):
         return self.num_workers
 
     def dataloader_kwargs(self) -> DataLoaderKwargs:
-        return {
+        num_workers = self._num_workers_or_auto()
+        kwargs: DataLoaderKwargs = {
             "batch_size": self.batch_size,
-            "num_workers": self._num_workers_or_auto(),
+            "num_workers": num_workers,
             "pin_memory": self.pin_memory,
         }
 
+        # These options are only valid for multi-process data loading.
+        if num_workers > 0:
+            kwargs["persistent_workers"] = self.persistent_workers
+            if self.prefetch_factor is not None:
+                kwargs["prefetch_factor"] = self.prefetch_factor
+
+        return kwargs
+
     @abstractmethod
     def dataset_configs(self) -> Iterable[DatasetConfig]: ...
 
@@ -195,6 +248,10 @@ class MatterTuneDataModule(LightningDataModule):
         # Save the configuration for Lightning.
         self.save_hyperparameters(hparams)
 
+        self._cuda_stream_transfer = (
+            CUDAStreamBatchTransfer() if hparams.cuda_stream_transfer else None
+        )
+
     @override
     def prepare_data(self) -> None:
         for config in self.hparams.dataset_configs():
@@ -205,6 +262,7 @@ class MatterTuneDataModule(LightningDataModule):
         super().setup(stage)
 
         self.datasets = self.hparams.create_datasets()
+        self._num_atoms: dict[str, np.ndarray] = {}
 
         # PyTorch Lightning checks for the *existence* of the
         # `train_dataloader`, `val_dataloader`, `test_dataloader`,
@@ -238,6 +296,52 @@ class MatterTuneDataModule(LightningDataModule):
 
         return lightning_module
 
+    @override
+    def transfer_batch_to_device(
+        self, batch: Any, device: torch.device, dataloader_idx: int
+    ) -> Any:
+        if (
+            transfer := self._cuda_stream_transfer
+        ) is not None and transfer.supports(batch, device):
+            return transfer(batch, device)
+
+        # Lightning only uses `non_blocking=True` for plain tensors, so we move
+        #   (e.g., PyG) batches ourselves. This makes copies from pinned memory
+        #   asynchronous w.r.t. the host.
+        if device.type == "cuda" and supports_non_blocking_transfer(batch):
+            return batch.to(device, non_blocking=True)
+
+        return super().transfer_batch_to_device(batch, device, dataloader_idx)
+
+    def _dataloader_kwargs(self, dataset_name: str, dataset: Dataset[ase.Atoms]):
+        kwargs = self.hparams.dataloader_kwargs()
+        if not self.hparams.bucket_by_num_atoms:
+            return kwargs
+
+        if not isinstance(dataset, Sized):
+            raise TypeError(
+                "`bucket_by_num_atoms` requires a sized dataset, "
+                f"but got {dataset!r}."
+            )
+
+        # Count the atoms of every structure once per dataset.
+        if (num_atoms := self._num_atoms.get(dataset_name)) is None:
+            num_atoms = np.array(
+                [len(dataset[idx]) for idx in range(len(dataset))], dtype=np.int64
+            )
+            self._num_atoms[dataset_name] = num_atoms
+
+        batch_size = kwargs.pop("batch_size")
+        assert batch_size is not None, "The batch size must be set."
+        kwargs["batch_sampler"] = BucketBatchSampler(
+            sampler=SequentialSampler(dataset),
+            batch_size=batch_size,
+            drop_last=False,
+            num_atoms=num_atoms,
+            bucket_size_multiplier=self.hparams.bucket_size_multiplier,
+        )
+        return kwargs
+
     @override
     def train_dataloader(self):
         if (dataset := self.datasets.get("train")) is None:
@@ -246,7 +350,7 @@ class MatterTuneDataModule(LightningDataModule):
         return self.lightning_module.create_dataloader(
             dataset,
             has_labels=True,
-            **self.hparams.dataloader_kwargs(),
+            **self._dataloader_kwargs("train", dataset),
         )
 
     @override
@@ -259,5 +363,5 @@ class MatterTuneDataModule(LightningDataModule):
         return self.lightning_module.create_dataloader(
             dataset,
             has_labels=True,
-            **self.hparams.dataloader_kwargs(),
+            **self._dataloader_kwargs("validation", dataset),
         )
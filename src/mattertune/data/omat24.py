@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import copy
+from collections import OrderedDict
 from pathlib import Path
 from typing import Literal
 
@@ -20,6 +22,11 @@ class OMAT24DatasetConfig(DatasetConfigBase):
     src: Path
     """The path to the OMAT24 dataset."""
 
+    cache_size: int = 0
+    """The number of structures to keep in an in-memory LRU cache (0 disables
+    the cache). This mostly helps when the same (e.g., validation) structures
+    are read every epoch. Note that each dataloader worker has its own cache."""
+
     @override
     def create_dataset(self):
         return OMAT24Dataset(self)
@@ -35,10 +42,47 @@ class OMAT24Dataset(Dataset[ase.Atoms]):
 
         self.dataset = AseDBDataset(config={"src": str(self.config.src)})
 
+        self._cache: OrderedDict[int, ase.Atoms] = OrderedDict()
+
+    def _get_atoms(self, idx: int) -> ase.Atoms:
+        if self.config.cache_size <= 0:
+            return self.dataset.get_atoms(idx)
+
+        # NOTE: We always hand out copies, so that downstream (in-place)
+        #   modifications do not leak into the cached structures.
+        if (atoms := self._cache.get(idx)) is not None:
+            self._cache.move_to_end(idx)
+            return _copy_atoms(atoms)
+
+        atoms = self.dataset.get_atoms(idx)
+        self._cache[idx] = atoms
+        if len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+        return _copy_atoms(atoms)
+
     @override
     def __getitem__(self, idx: int) -> ase.Atoms:
-        atoms = self.dataset.get_atoms(idx)
+        atoms = self._get_atoms(idx)
         return atoms
 
+    def __getitems__(self, indices: list[int]) -> list[ase.Atoms]:
+        # Called by the DataLoader with all indices of a batch at once.
+        if self.config.cache_size <= 0 and (
+            get_atoms_list := getattr(self.dataset, "get_atoms_list", None)
+        ) is not None:
+            return list(get_atoms_list(indices))
+        return [self._get_atoms(idx) for idx in indices]
+
     def __len__(self) -> int:
         return len(self.dataset)
+
+
+def _copy_atoms(atoms: ase.Atoms) -> ase.Atoms:
+    """Copy ``atoms``, including the results of its (single-point) calculator,
+    which hold the labels. ``Atoms.copy`` alone drops the calculator."""
+    copied = atoms.copy()
+    if (calc := atoms.calc) is not None:
+        calc = copy.copy(calc)
+        calc.results = copy.deepcopy(calc.results)
+        copied.calc = calc
+    return copied
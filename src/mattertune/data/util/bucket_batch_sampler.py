@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+
+import numpy as np
+import torch
+from torch.utils.data import BatchSampler, Sampler
+from typing_extensions import override
+
+
+class BucketBatchSampler(BatchSampler):
+    """
+    Batch sampler that groups structures with a similar number of atoms.
+
+    Indices are drawn from ``sampler`` in pools of
+    ``batch_size * bucket_size_multiplier``. Each pool is sorted by the number
+    of atoms and split into batches of ``batch_size``, and the order of the
+    batches within a pool is shuffled. This way, every batch contains
+    structures of similar size, which reduces the imbalance between small and
+    large structures within a batch.
+
+    The number of batches is the same as for a regular ``BatchSampler`` with
+    the same ``batch_size`` and ``drop_last``, so all ranks of a distributed
+    run see the same number of batches. In a distributed setting, Lightning
+    replaces ``sampler`` with a ``DistributedSampler``, so the bucketing
+    happens within each rank's shard of the dataset.
+    """
+
+    @override
+    def __init__(
+        self,
+        sampler: Sampler[int] | Iterable[int],
+        batch_size: int,
+        drop_last: bool,
+        num_atoms: Sequence[int] | np.ndarray,
+        bucket_size_multiplier: int = 100,
+    ):
+        super().__init__(sampler, batch_size, drop_last)
+
+        if bucket_size_multiplier < 1:
+            raise ValueError(
+                f"bucket_size_multiplier must be a positive integer, but got {bucket_size_multiplier}."
+            )
+
+        self.num_atoms = np.asarray(num_atoms)
+        self.bucket_size_multiplier = bucket_size_multiplier
+
+    @override
+    def __iter__(self) -> Iterator[list[int]]:
+        pool_size = self.batch_size * self.bucket_size_multiplier
+        for pool in BatchSampler(self.sampler, pool_size, drop_last=False):
+            pool = sorted(pool, key=lambda idx: self.num_atoms[idx])
+            batches = [
+                pool[i : i + self.batch_size]
+                for i in range(0, len(pool), self.batch_size)
+            ]
+            # Only the very last pool can end with an incomplete batch.
+            if self.drop_last and len(batches[-1]) < self.batch_size:
+                batches.pop()
+
+            for batch_idx in torch.randperm(len(batches)).tolist():
+                yield batches[batch_idx]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from typing import Any
+
+import torch
+
+
+def _supports_stream_transfer(batch: Any) -> bool:
+    # PyG's `Data`/`Batch` (and anything that behaves like them) can be moved
+    #   with `.to(device, non_blocking=True)` and expose `record_stream`,
+    #   which covers all nested tensors in the batch.
+    return callable(getattr(batch, "to", None)) and callable(
+        getattr(batch, "record_stream", None)
+    )
+
+
+def supports_non_blocking_transfer(batch: Any) -> bool:
+    """Whether ``batch`` can be moved with ``batch.to(device, non_blocking=True)``."""
+    return _supports_stream_transfer(batch)
+
+
+_TRANSFER_EVENT_ATTR = "_mattertune_transfer_event"
+
+
+def transfer_event(batch: Any) -> torch.cuda.Event | None:
+    """
+    The event recorded (on the side stream) once ``batch`` was copied by
+    `CUDAStreamBatchTransfer`, or ``None`` if it was transferred some other way.
+
+    Work that only depends on the batch itself can wait on this event instead
+    of the compute stream, so it does not have to wait for the (possibly still
+    running) previous training step.
+    """
+    return getattr(batch, _TRANSFER_EVENT_ATTR, None)
+
+
+class CUDAStreamBatchTransfer:
+    """
+    Copies batches to a CUDA device on a dedicated side stream.
+
+    The copy is issued with ``non_blocking=True`` on a side stream, so it can
+    run while the kernels of the previous training step (which are still queued
+    on the compute stream) are executing. The compute stream then waits on the
+    side stream before the batch is used, and the batch's tensors are recorded
+    on the compute stream so that the caching allocator does not reuse their
+    memory too early.
+
+    For the copy to be truly asynchronous, the batch should live in pinned
+    memory (i.e., the dataloader should use ``pin_memory=True``).
+    """
+
+    def __init__(self):
+        self._streams: dict[torch.device, torch.cuda.Stream] = {}
+
+    def supports(self, batch: Any, device: torch.device) -> bool:
+        """Whether ``batch`` can be transferred to ``device`` using a side stream."""
+        return device.type == "cuda" and _supports_stream_transfer(batch)
+
+    def __call__(self, batch: Any, device: torch.device):
+        if (stream := self._streams.get(device)) is None:
+            stream = torch.cuda.Stream(device=device)
+            self._streams[device] = stream
+
+        compute_stream = torch.cuda.current_stream(device)
+        with torch.cuda.stream(stream):
+            batch = batch.to(device, non_blocking=True)
+            event = torch.cuda.Event()
+            event.record(stream)
+
+        compute_stream.wait_stream(stream)
+        batch.record_stream(compute_stream)
+        # NOTE: Attributes with a leading underscore are not stored as data
+        #   in PyG's `Data`/`Batch`, so this does not end up in the batch itself.
+        setattr(batch, _TRANSFER_EVENT_ATTR, event)
+        return batch
@@ -42,3 +42,9 @@ class SplitDataset(Dataset[ase.Atoms], Generic[TDataset]):
     def __getitem__(self, index: int) -> Atoms:
         index = int(self.indices[index])
         return self.dataset[index]
+
+    def __getitems__(self, indices: list[int]) -> list[Atoms]:
+        indices = self.indices[indices].tolist()
+        if (getitems := getattr(self.dataset, "__getitems__", None)) is not None:
+            return list(getitems(indices))
+        return [self.dataset[index] for index in indices]
@@ -4,7 +4,7 @@ import contextlib
 import logging
 from abc import ABC, abstractmethod
 from collections.abc import Iterable, Mapping, Sequence
-from typing import Any, Generic
+from typing import Any, Generic, Literal
 
 import ase
 import nshconfig as C
@@ -13,11 +13,19 @@ import torch.nn as nn
 from lightning.pytorch import LightningModule
 from lightning.pytorch.utilities.types import OptimizerLRSchedulerConfig
 from torch.utils.data import Dataset
-from typing_extensions import NotRequired, TypedDict, TypeVar, Unpack, cast, override
+from typing_extensions import (
+    NotRequired,
+    TypedDict,
+    TypeVar,
+    Unpack,
+    assert_never,
+    cast,
+    override,
+)
 
 from ..normalization import ComposeNormalizers, NormalizationContext, NormalizerConfig
 from .loader import DataLoaderKwargs, create_dataloader
-from .loss import compute_loss
+from .loss import LossConfig, compute_loss
 from .lr_scheduler import LRSchedulerConfig, create_lr_scheduler
 from .metrics import FinetuneMetrics
 from .optimizer import OptimizerConfig, create_optimizer
@@ -39,6 +47,48 @@ class FinetuneModuleBaseConfig(C.Config, ABC):
     ignore_gpu_batch_transform_error: bool = True
     """Whether to ignore data processing errors during training."""
 
+    compile: bool = False
+    """Whether to compile the model forward pass (i.e., the backbone and output
+    heads, see ``model_forward``) with ``torch.compile``.
+
+    Compilation uses dynamic shapes, since the number of atoms and edges
+    varies from batch to batch, and the default mode (i.e., no CUDA graphs,
+    which would be recorded again for almost every batch shape). The forward
+    pass is compiled lazily on its first call. ``gpu_batch_transform`` (e.g.,
+    the radius graph construction) is not compiled, since its output shapes
+    are data-dependent. Requires PyTorch 2.2 or newer.
+    """
+
+    autocast_dtype: Literal["fp32", "bf16", "fp16"] = "fp32"
+    """The dtype to run the model forward pass (i.e., the backbone and output
+    heads, see ``model_forward``) in using ``torch.autocast``. "fp32" disables
+    autocasting.
+
+    Unlike the trainer's mixed ``precision``, only the forward pass is
+    autocast: the predicted properties are returned in float32, so the
+    normalization, losses and metrics are computed in full precision. Leaf
+    inputs such as atomic positions are not cast, so gradient-based forces and
+    stresses are taken with respect to float32 positions.
+    """
+
+    overlap_gpu_batch_transform: bool = False
+    """Whether to run ``gpu_batch_transform`` (e.g., the radius graph
+    construction) on a side CUDA stream that only waits for the batch's
+    host-to-device copy, so that it can overlap with the tail of the previous
+    step's kernels.
+
+    This only takes effect for batches copied with the data module's
+    ``cuda_stream_transfer`` option; other batches are transformed as usual.
+    """
+
+    defer_scalar_logging: bool = False
+    """Whether to accumulate the losses on the device and only log their epoch
+    means at the end of each epoch, instead of logging them at every step.
+
+    This avoids synchronizing the device with the host for every logged loss,
+    at the cost of losing the per-step loss curves.
+    """
+
     normalizers: Mapping[str, Sequence[NormalizerConfig]] = {}
     """Normalizers for the properties.
 
@@ -89,8 +139,8 @@ class _SkipBatchError(Exception):
     if an error occurs during the forward pass. This is useful for
     handling edge cases where a batch may be invalid or cause an error
     during the forward pass. In this case, we can throw this exception
-    anywhere in the forward pas and then catch it in the `_common_step`
-    method. If this exception is caught, we can just skip the batch
+    anywhere in the forward pass, and `forward` will return ``None`` instead
+    of the model output. `_common_step` then just skips the batch
     instead of logging an error.
 
     This is primarily used to skip graph generation errors in messy data. E.g.,
@@ -129,6 +179,11 @@ class FinetuneModuleBase(
     Finetune module base class. Inherits ``lightning.pytorch.LightningModule``.
     """
 
+    _has_forward_context: bool = True
+    """Whether `model_forward_context` does anything. Subclasses whose context
+    is a no-op (for their configuration) can set this to ``False`` so that it is
+    not entered on every forward pass."""
+
     @classmethod
     @abstractmethod
     def hparams_cls(cls) -> type[TFinetuneModuleConfig]:
@@ -153,6 +208,10 @@ class FinetuneModuleBase(
 
         This is used for any setup that needs to be done before the forward pass,
         e.g., setting pos.requires_grad_() for gradient-based force prediction.
+
+        NOTE: The context is entered outside of the ``autocast_dtype`` autocast
+        region, so any tensors created here (e.g., the positions that forces are
+        differentiated against) stay in full precision.
         """
         ...
 
@@ -277,6 +336,7 @@ class FinetuneModuleBase(
 
     hparams: TFinetuneModuleConfig  # pyright: ignore[reportIncompatibleMethodOverride]
     hparams_initial: TFinetuneModuleConfig  # pyright: ignore[reportIncompatibleMethodOverride]
+    _loss_coefficients: torch.Tensor
 
     def __init__(self, hparams: TFinetuneModuleConfig | Mapping[str, Any]):
         hparams_cls = self.hparams_cls()
@@ -291,19 +351,68 @@ class FinetuneModuleBase(
         # Create the backbone model and output heads
         self.create_model()
 
+        match self.hparams.autocast_dtype:
+            case "fp32":
+                self._autocast_dtype = None
+            case "bf16":
+                self._autocast_dtype = torch.bfloat16
+            case "fp16":
+                self._autocast_dtype = torch.float16
+            case _:
+                assert_never(self.hparams.autocast_dtype)
+
+        # The compiled model forward pass, see `compile` and `_get_inner_forward`
+        self._compiled_inner_forward = None
+
+        # Cache the per-property loss configs/coefficients. NOTE: This must be
+        #   done after `create_model`, which may reorder the properties.
+        self._create_loss_specs()
+
         # Create metrics
         self.create_metrics()
 
         # Create normalization modules
         self.create_normalizers()
 
+        # Side streams for `overlap_gpu_batch_transform`, one per device
+        self._gpu_batch_transform_streams: dict[torch.device, torch.cuda.Stream] = {}
+
+        # Cache the parameter lists, so that they are only collected once
+        #   (e.g., for the zero loss of skipped batches and the optimizer)
+        self._parameters_list = tuple(self.parameters())
+        self._backbone_parameters = tuple(self.pretrained_backbone_parameters())
+        self._head_parameters = tuple(self.output_head_parameters())
+
         # Ensure that some parameters require gradients
-        if not any(p.requires_grad for p in self.parameters()):
+        if not any(p.requires_grad for p in self._parameters_list):
             raise ValueError(
                 "No parameters require gradients. "
                 "Please ensure that some parts of the model are trainable."
             )
 
+    def _create_loss_specs(self):
+        # (name, loss config, loss coefficient) for every property, flattened
+        #   into plain tuples so that the per-step code does not go through the
+        #   config objects' attribute access.
+        self._prop_specs: tuple[tuple[str, LossConfig, float], ...] = tuple(
+            (prop.name, prop.loss, float(prop.loss_coefficient))
+            for prop in self.hparams.properties
+        )
+        # Non-persistent, so that it moves with the module but does not change
+        #   the checkpoint format.
+        self.register_buffer(
+            "_loss_coefficients",
+            torch.tensor([coef for _, _, coef in self._prop_specs], dtype=torch.float),
+            persistent=False,
+        )
+
+        # log_prefix -> the names of the logged (per-property and total) losses
+        self._loss_log_names: dict[str, tuple[str, ...]] = {}
+
+        # log_prefix -> [sum of the (per-property and total) losses, #steps],
+        #   see `defer_scalar_logging`
+        self._deferred_losses: dict[str, list[Any]] = {}
+
     def create_metrics(self):
         self.train_metrics = FinetuneMetrics(self.hparams.properties)
         self.val_metrics = FinetuneMetrics(self.hparams.properties)
@@ -379,43 +488,159 @@ class FinetuneModuleBase(
                 denormalized_properties[prop_name] = prop_value
         return denormalized_properties
 
+    def _run_gpu_batch_transform(self, batch: TBatch) -> TBatch:
+        if not self.hparams.overlap_gpu_batch_transform:
+            return self.gpu_batch_transform(batch)
+
+        from ..data.util.cuda_stream_transfer import transfer_event
+
+        if (event := transfer_event(batch)) is None:
+            return self.gpu_batch_transform(batch)
+
+        # Run the transform on a side stream that only waits for the batch's
+        #   copy, then make the compute stream wait for the transform.
+        if (stream := self._gpu_batch_transform_streams.get(self.device)) is None:
+            stream = torch.cuda.Stream(device=self.device)
+            self._gpu_batch_transform_streams[self.device] = stream
+
+        compute_stream = torch.cuda.current_stream(self.device)
+        stream.wait_event(event)
+        cast(Any, batch).record_stream(stream)
+        with torch.cuda.stream(stream):
+            batch = self.gpu_batch_transform(batch)
+
+        compute_stream.wait_stream(stream)
+        cast(Any, batch).record_stream(compute_stream)
+        return batch
+
     @override
     def forward(
         self,
         batch: TBatch,
         return_backbone_output: bool = False,
         ignore_gpu_batch_transform_error: bool | None = None,
-    ) -> ModelOutput:
+    ) -> ModelOutput | None:
+        """
+        Run the forward pass on ``batch``.
+
+        Returns ``None`` if the batch should be skipped, i.e., if the GPU batch
+        transform failed (and ``ignore_gpu_batch_transform_error`` is set) or if
+        the model raised `_SkipBatchError`.
+        """
         if ignore_gpu_batch_transform_error is None:
             ignore_gpu_batch_transform_error = (
                 self.hparams.ignore_gpu_batch_transform_error
             )
 
-        with self.model_forward_context(batch):
-            # Generate graph/etc
-            if ignore_gpu_batch_transform_error:
-                try:
-                    batch = self.gpu_batch_transform(batch)
-                except Exception as e:
-                    log.warning("Error in forward pass. Skipping batch.", exc_info=e)
-                    raise _SkipBatchError() from e
-            else:
-                batch = self.gpu_batch_transform(batch)
+        try:
+            if not self._has_forward_context:
+                return self._forward_in_context(
+                    batch, return_backbone_output, ignore_gpu_batch_transform_error
+                )
+
+            with self.model_forward_context(batch):
+                return self._forward_in_context(
+                    batch, return_backbone_output, ignore_gpu_batch_transform_error
+                )
+        except _SkipBatchError:
+            return None
+
+    def forward_with_labels(
+        self,
+        batch: TBatch,
+    ) -> tuple[ModelOutput, dict[str, torch.Tensor]] | None:
+        """
+        Run the forward pass and extract the ground truth labels from ``batch``.
+
+        The default implementation calls `forward` followed by `batch_to_labels`
+        (the labels are only extracted if the batch is not skipped). Subclasses
+        whose forward pass already has the labels at hand (e.g., because
+        `gpu_batch_transform` rebuilds the batch) can override this to avoid
+        a second pass over the batch.
+
+        Returns ``None`` if the batch should be skipped (see `forward`).
+        """
+        if (output := self(batch)) is None:
+            return None
+        return output, self.batch_to_labels(batch)
+
+    def _forward_in_context(
+        self,
+        batch: TBatch,
+        return_backbone_output: bool,
+        ignore_gpu_batch_transform_error: bool,
+    ) -> ModelOutput | None:
+        # Generate graph/etc
+        if ignore_gpu_batch_transform_error:
+            try:
+                batch = self._run_gpu_batch_transform(batch)
+            except Exception as e:
+                # The traceback is only included when debug logging is enabled,
+                #   as formatting it for every skipped batch is expensive.
+                log.warning(
+                    "Error in forward pass (%s: %s). Skipping batch.",
+                    type(e).__name__,
+                    e,
+                    exc_info=log.isEnabledFor(logging.DEBUG),
+                )
+                return None
+        else:
+            batch = self._run_gpu_batch_transform(batch)
+
+        # Run the model
+        return self._get_inner_forward()(batch, return_backbone_output)
+
+    def _get_inner_forward(self):
+        if not self.hparams.compile:
+            return self._inner_forward
+
+        # Compile lazily, on the first forward pass. NOTE: We compile a bound
+        #   method (instead of the modules), so the parameter names (and thus
+        #   checkpoints) are the same as for the uncompiled model.
+        if (inner_forward := self._compiled_inner_forward) is None:
+            inner_forward = self._compiled_inner_forward = torch.compile(
+                self._inner_forward, dynamic=True
+            )
+        return inner_forward
 
-            # Run the model
+    @override
+    def __getstate__(self):
+        state = super().__getstate__()
+        # The compiled forward pass cannot be pickled; it is compiled again
+        #   (lazily) after unpickling.
+        state["_compiled_inner_forward"] = None
+        return state
+
+    def _inner_forward(
+        self,
+        batch: TBatch,
+        return_backbone_output: bool = False,
+    ) -> ModelOutput:
+        if (autocast_dtype := self._autocast_dtype) is None:
             model_output = self.model_forward(
                 batch, return_backbone_output=return_backbone_output
             )
-
             model_output["predicted_properties"] = {
                 prop_name: prop_value.contiguous()
                 for prop_name, prop_value in model_output[
                     "predicted_properties"
                 ].items()
             }
-
             return model_output
 
+        with torch.autocast(device_type=self.device.type, dtype=autocast_dtype):
+            model_output = self.model_forward(
+                batch, return_backbone_output=return_backbone_output
+            )
+
+        # Return the predictions (and compute the losses) in full precision
+        model_output["predicted_properties"] = {
+            prop_name: prop_value.float().contiguous()
+            for prop_name, prop_value in model_output["predicted_properties"].items()
+        }
+
+        return model_output
+
     def _compute_loss(
         self,
         predictions: dict[str, torch.Tensor],
@@ -423,28 +648,94 @@ class FinetuneModuleBase(
         log: bool = True,
         log_prefix: str = "",
     ):
-        losses: list[torch.Tensor] = []
-        for prop in self.hparams.properties:
-            # Get the target and prediction
-            prediction = predictions[prop.name]
-            label = labels[prop.name]
-
-            # Compute the loss
-            loss = compute_loss(prop.loss, prediction, label) * prop.loss_coefficient
-
-            # Log the loss
-            if log:
-                self.log(f"{log_prefix}{prop.name}_loss", loss)
-            losses.append(loss)
+        # Compute the per-property losses and weight them by their coefficients
+        losses = torch.stack(
+            [
+                compute_loss(loss_config, predictions[name], labels[name])
+                for name, loss_config, _ in self._prop_specs
+            ]
+        )
+        weighted_losses = losses * self._loss_coefficients
 
         # Sum the losses
-        loss = cast(torch.Tensor, sum(losses))
+        loss = weighted_losses.sum()
 
-        # Log the total loss & return
-        if log:
-            self.log(f"{log_prefix}total_loss", loss)
+        # Log the per-property and total losses (in a single call) & return
+        if log and self.hparams.defer_scalar_logging:
+            self._accumulate_losses(log_prefix, weighted_losses, loss)
+        elif log:
+            self._log_losses(log_prefix, (*weighted_losses.unbind(), loss))
         return loss
 
+    def _log_losses(self, log_prefix: str, losses: Sequence[torch.Tensor]):
+        names = self._get_loss_log_names(log_prefix)
+        if log_prefix == "train/":
+            # Training losses are logged per step from each rank's local value,
+            #   so no cross-process reduction is issued on every step.
+            self.log_dict(
+                dict(zip(names, losses)),
+                on_step=True,
+                on_epoch=False,
+                sync_dist=False,
+            )
+        else:
+            # Validation/test losses are only reduced (and synced) at epoch end.
+            self.log_dict(
+                dict(zip(names, losses)),
+                on_step=False,
+                on_epoch=True,
+                sync_dist=True,
+            )
+
+    def _get_loss_log_names(self, log_prefix: str):
+        if (names := self._loss_log_names.get(log_prefix)) is None:
+            names = tuple(f"{log_prefix}{name}_loss" for name, _, _ in self._prop_specs)
+            names = self._loss_log_names[log_prefix] = (
+                *names,
+                f"{log_prefix}total_loss",
+            )
+        return names
+
+    def _accumulate_losses(
+        self,
+        log_prefix: str,
+        weighted_losses: torch.Tensor,
+        loss: torch.Tensor,
+    ):
+        losses = torch.cat([weighted_losses, loss.unsqueeze(0)]).detach()
+        if (accumulated := self._deferred_losses.get(log_prefix)) is None:
+            self._deferred_losses[log_prefix] = [losses.clone(), 1]
+        else:
+            accumulated[0].add_(losses)
+            accumulated[1] += 1
+
+    def _log_deferred_losses(self, log_prefix: str):
+        if (accumulated := self._deferred_losses.pop(log_prefix, None)) is None:
+            return
+
+        loss_sum, num_steps = accumulated
+        self.log_dict(
+            dict(
+                zip(
+                    self._get_loss_log_names(log_prefix),
+                    (loss_sum / num_steps).unbind(),
+                )
+            ),
+            sync_dist=True,
+        )
+
+    def _zero_loss(self) -> torch.Tensor:
+        # Return a zero loss tensor that is still attached to all trainable
+        #   parameters so that the optimizer can still update them.
+        # This prevents DDP unused parameter errors.
+        # NOTE: We only take (a view of) the first element of each parameter and
+        #   concatenate them, so this is a handful of kernels regardless of the
+        #   number of parameters (instead of one reduction per parameter).
+        params = [p.reshape(-1)[:1] for p in self._parameters_list if p.requires_grad]
+        if not params:
+            return torch.zeros((), device=self.device)
+        return torch.cat(params).sum() * 0.0
+
     def _common_step(
         self,
         batch: TBatch,
@@ -452,26 +743,15 @@ class FinetuneModuleBase(
         metrics: FinetuneMetrics | None,
         log: bool = True,
     ):
-        try:
-            output: ModelOutput = self(batch)
-        except _SkipBatchError:
-
-            def _zero_output():
-                return {
-                    "predicted_properties": {},
-                    "backbone_output": None,
-                }
-
-            def _zero_loss():
-                # Return a zero loss tensor that is still attached to all
-                #   parameters so that the optimizer can still update them.
-                # This prevents DDP unused parameter errors.
-                return cast(torch.Tensor, sum(p.sum() * 0.0 for p in self.parameters()))
-
-            return _zero_output(), _zero_loss()
+        # Run the model and extract the labels from the batch
+        if (output_and_labels := self.forward_with_labels(batch)) is None:
+            skipped_output: ModelOutput = {
+                "predicted_properties": {},
+                "backbone_output": None,
+            }
+            return skipped_output, self._zero_loss()
 
-        # Extract labels from the batch
-        labels = self.batch_to_labels(batch)
+        output, labels = output_and_labels
         predictions = output["predicted_properties"]
 
         # Create the normalization context required for normalization/referencing.
@@ -513,6 +793,9 @@ class FinetuneModuleBase(
                     f"{name}/{metric_name}": metric
                     for metric_name, metric in metrics(predictions, labels).items()
                 },
+                # The metrics are only updated per step, so they can only be
+                #   logged (i.e., computed) at the end of the epoch.
+                on_step=False,
                 on_epoch=True,
                 sync_dist=True,
             )
@@ -520,12 +803,34 @@ class FinetuneModuleBase(
 
     @override
     def training_step(self, batch: TBatch, batch_idx: int):
-        _, loss = self._common_step(
+        output, loss = self._common_step(
             batch,
             "train",
             self.train_metrics,
         )
         self.log("lr", self.trainer.optimizers[0].param_groups[0]["lr"])
+
+        # The metrics are only computed at the end of the epoch, so we also log
+        #   the total loss (a single, unsynced scalar) on every step for the
+        #   progress bar and step-level curves.
+        self.log(
+            "train/step_loss",
+            loss.detach(),
+            on_step=True,
+            on_epoch=False,
+            sync_dist=False,
+            prog_bar=True,
+        )
+
+        # If the batch was skipped and we're the only process, we skip the
+        #   backward pass (and optimizer step) altogether by returning `None`.
+        # NOTE: With multiple processes, we must still run the backward pass on
+        #   the zero loss, since the other ranks will wait for our gradients in
+        #   their all-reduce (skipping it, or running it under `no_sync`, on
+        #   this rank alone would deadlock). Lightning already uses `no_sync`
+        #   for the non-boundary steps of gradient accumulation.
+        if not output["predicted_properties"] and self.trainer.world_size == 1:
+            return None
         return loss
 
     @override
@@ -536,16 +841,32 @@ class FinetuneModuleBase(
     def test_step(self, batch: TBatch, batch_idx: int):
         _ = self._common_step(batch, "test", self.test_metrics)
 
+    @override
+    def on_train_epoch_end(self):
+        self._log_deferred_losses("train/")
+
+    @override
+    def on_validation_epoch_end(self):
+        self._log_deferred_losses("val/")
+
+    @override
+    def on_test_epoch_end(self):
+        self._log_deferred_losses("test/")
+
     @override
     def predict_step(self, batch: TBatch, batch_idx: int):
-        output: ModelOutput = self(batch, ignore_gpu_batch_transform_error=False)
+        output: ModelOutput | None = self(
+            batch, ignore_gpu_batch_transform_error=False
+        )
+        if output is None:
+            raise RuntimeError("The forward pass failed for a batch during prediction.")
         predictions = output["predicted_properties"]
         normalization_ctx = self.create_normalization_context_from_batch(batch)
         denormalized_predictions = self.denormalize(predictions, normalization_ctx)
         return denormalized_predictions
 
     def trainable_parameters(self) -> Iterable[nn.Parameter]:
-        return self.parameters()
+        return self._parameters_list
 
     @override
     def configure_optimizers(self):
@@ -581,7 +902,10 @@ class FinetuneModuleBase(
             has_labels: Whether the dataset contains labels. This should be
                 `True` for train/val/test datasets and `False` for prediction datasets.
             **kwargs: Additional keyword arguments to pass to the DataLoader.
+                Unless set explicitly, memory is pinned if CUDA is available.
         """
+        if torch.cuda.is_available():
+            kwargs.setdefault("pin_memory", True)
         return create_dataloader(dataset, has_labels, lightning_module=self, **kwargs)
 
     def property_predictor(
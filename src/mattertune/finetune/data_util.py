@@ -30,6 +30,13 @@ class MapDatasetWrapper(Dataset[TDataOut], Generic[TDataIn, TDataOut]):
     def __getitem__(self, idx: int) -> TDataOut:
         return self.map_fn(self.dataset[idx])
 
+    def __getitems__(self, indices: list[int]) -> list[TDataOut]:
+        # Forward batched fetching (see `torch.utils.data.Dataset.__getitems__`)
+        #   to the underlying dataset, if it supports it.
+        if (getitems := getattr(self.dataset, "__getitems__", None)) is not None:
+            return [self.map_fn(data) for data in getitems(indices)]
+        return [self.map_fn(self.dataset[idx]) for idx in indices]
+
 
 class IterableDatasetWrapper(IterableDataset[TDataOut], Generic[TDataIn, TDataOut]):
     @override
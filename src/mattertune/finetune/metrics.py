@@ -49,10 +49,13 @@ class PropertyMetrics(MetricBase):
             raise ValueError(
                 f"Prediction shape {y_hat.shape} does not match ground truth shape {y.shape}"
             )
-        self.mae(y_hat, y)
-        self.mse(y_hat, y)
-        self.rmse(y_hat, y)
-        # self.r2(y_hat, y)
+        # NOTE: We only `update` the metric states here (instead of calling the
+        #   metrics, which also computes the per-batch values). The metrics are
+        #   computed once, at the end of the epoch, by Lightning.
+        self.mae.update(y_hat, y)
+        self.mse.update(y_hat, y)
+        self.rmse.update(y_hat, y)
+        # self.r2.update(y_hat, y)
 
         return {
             f"{self.property_name}_mae": self.mae,
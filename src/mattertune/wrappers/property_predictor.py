@@ -51,6 +51,11 @@ class MatterTunePropertyPredictor:
         self.lightning_module = lightning_module
         self._lightning_trainer_kwargs = lightning_trainer_kwargs or {}
 
+        # The trainer is created on the first call to `predict` and reused
+        #   afterwards, as `predict` may be called in a tight loop (e.g., by
+        #   the ASE calculator during MD or structure optimization).
+        self._trainer: Trainer | None = None
+
     def predict(
         self,
         atoms_list: list[ase.Atoms],
@@ -80,15 +85,18 @@ class MatterTunePropertyPredictor:
 
         Notes
         -----
-        - Creates a temporary trainer instance for prediction
+        - Creates a trainer instance on the first call and reuses it afterwards
         - Converts input atoms to a dataloader compatible with the model
         - Returns raw prediction outputs from the model
         """
         # Resolve `properties` to a list of `PropertyConfig` objects.
         properties = _resolve_properties(properties, self.lightning_module.hparams)
 
-        # Create a trainer instance.
-        trainer = _create_trainer(self._lightning_trainer_kwargs, self.lightning_module)
+        # Create a trainer instance (or reuse the one from a previous call).
+        if (trainer := self._trainer) is None:
+            trainer = self._trainer = _create_trainer(
+                self._lightning_trainer_kwargs, self.lightning_module
+            )
 
         # Create a dataloader from the atoms_list.
         dataloader = _atoms_list_to_dataloader(
@@ -202,5 +210,8 @@ def _atoms_list_to_dataloader(
         batch_size=batch_size,
         shuffle=False,
         num_workers=0,
+        # The batches are small and not copied asynchronously here, so pinning
+        #   the memory would only add overhead to every prediction.
+        pin_memory=False,
     )
     return dataloader